@@ -5,19 +5,89 @@ import sqlite3
 import os
 import argparse
 import sys
-import re
 import csv
-from typing import List, Dict, Any
+import operator
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Tuple
 
 # --- Constantes de Normalisation ---
 
-ERROR_PATTERN = (
-    r"The specified file .* does not exists or is not readable\.: Invalid file"
-)
+# Motif "The specified file <chemin> does not exists or is not readable.: Invalid file"
+# testé par préfixe/suffixe littéraux plutôt que par expression régulière.
+ERROR_PREFIX = "The specified file "
+ERROR_SUFFIX = " does not exists or is not readable.: Invalid file"
+_ERROR_MIN_LEN = len(ERROR_PREFIX) + len(ERROR_SUFFIX)
 NORMALIZED_ERROR_MESSAGE = (
     "The specified file {{file_full_path}} does not exists or is not readable.: Invalid file"
 )
 
+# Compteurs cumulés par dossier, dans l'ordre des colonnes de la synthèse
+FOLDER_TOTAL_KEYS = (
+    "total_rows",
+    "is_done_1_count",
+    "is_done_0_count",
+    "cmx_document_id_not_empty_count",
+    "is_done_0_with_error_count",
+)
+
+# Réglages SQLite pour une lecture analytique (connexion en lecture seule,
+# cache de pages de 64 Mio, mmap de 256 Mio, tables temporaires en mémoire).
+_READ_PRAGMAS = (
+    "PRAGMA query_only = 1",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def _not_blank(column: str) -> str:
+    """
+    Condition SQL équivalente à TRIM(column) <> '' (TRIM ne retire que les
+    espaces) : vraie si la valeur contient au moins un caractère autre qu'un
+    espace, sans construire de copie « trimée » de chaque valeur.
+    """
+    return f"{column} GLOB '*[^ ]*'"
+
+
+# Requêtes statistiques ({table} est renseigné par _build_queries)
+
+# 1 à 5. Tous les compteurs en un seul parcours de la table
+_SQL_COUNTS = f"""
+    SELECT COUNT(*),
+           SUM(CASE WHEN is_done = 1 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN cmx_document_id IS NOT NULL
+                     AND {_not_blank('cmx_document_id')}
+                    THEN 1 ELSE 0 END),
+           SUM(CASE WHEN is_done = 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN is_done = 0
+                     AND error_message IS NOT NULL
+                     AND {_not_blank('error_message')}
+                    THEN 1 ELSE 0 END)
+    FROM {{table}}
+"""
+
+# 6. Messages d'erreur distincts et leur nombre d'occurrences
+_SQL_ERROR_MESSAGES = f"""
+    SELECT error_message, COUNT(*)
+    FROM {{table}}
+    WHERE is_done = 0
+      AND error_message IS NOT NULL
+      AND {_not_blank('error_message')}
+    GROUP BY error_message
+"""
+
+
+@lru_cache(maxsize=None)
+def _build_queries(table_name: str) -> Tuple[str, str]:
+    """Construit une seule fois par nom de table les requêtes de get_stats."""
+    return (
+        _SQL_COUNTS.format(table=table_name),
+        _SQL_ERROR_MESSAGES.format(table=table_name),
+    )
+
+
 # --- Classe d'Analyse ---
 
 
@@ -27,115 +97,126 @@ class SQLiteAnalyzer:
     et exécuter les requêtes statistiques requises.
     """
 
-    def __init__(self, db_path: str, table_name: str = "TBL_FSADA"):
+    def __init__(
+        self,
+        db_path: str,
+        table_name: str = "TBL_FSADA",
+        build_indexes: bool = False,
+    ):
         self.db_path = db_path
+        self.db_name = os.path.basename(db_path)
         self.table_name = table_name
+        self._sql_counts, self._sql_error_messages = _build_queries(table_name)
+        self.build_indexes = build_indexes
+        self._conn: sqlite3.Connection | None = None
 
-    def _execute_query(self, query: str, fetch_one: bool = False) -> Any:
-        """Exécute une requête et retourne les résultats."""
-        conn = None
-        result = None
-
+    def __enter__(self) -> "SQLiteAnalyzer":
+        """Ouvre l'unique connexion utilisée pour toutes les requêtes de la base."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(query)
+            self._conn = sqlite3.connect(self.db_path)
+        except sqlite3.Error as e:
+            sys.stderr.write(
+                f"⚠️  Impossible d'ouvrir '{self.db_name}': {e}\n"
+            )
+            self._conn = None
+            return self
+
+        if self.build_indexes:
+            self._ensure_indexes()
+        for pragma in _READ_PRAGMAS:
+            try:
+                self._conn.execute(pragma)
+            except sqlite3.Error:
+                # Réglage non supporté par cette version de SQLite : ignoré
+                pass
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
+    def _execute_query(self, query: str, fetch_one: bool = False) -> Any:
+        """Exécute une requête sur la connexion ouverte et retourne les résultats."""
+        try:
+            cursor = self._conn.execute(query)
             if fetch_one:
-                fetch_result = cursor.fetchone()
-                result = fetch_result[0] if fetch_result else 0
-            else:
-                result = cursor.fetchall()
+                return cursor.fetchone()
+            return cursor.fetchall()
 
         except sqlite3.OperationalError as e:
             sys.stderr.write(
-                f"⚠️  Erreur Opérationnelle dans '{os.path.basename(self.db_path)}': {e}\n"
+                f"⚠️  Erreur Opérationnelle dans '{self.db_name}': {e}\n"
             )
-            result = None
         except sqlite3.Error as e:
             sys.stderr.write(
-                f"⚠️  Erreur SQLite générale dans '{os.path.basename(self.db_path)}': {e}\n"
+                f"⚠️  Erreur SQLite générale dans '{self.db_name}': {e}\n"
             )
-            result = None
-        finally:
-            if conn:
-                conn.close()
-
-        return result
-
-    def get_stats(self) -> Dict[str, Any] | None:
-        """Calcule toutes les statistiques requises."""
-        db_name = os.path.basename(self.db_path)
-        print(f"⏳ Analyse de la base de données: {db_name}")
+        return None
 
+    def _ensure_indexes(self) -> None:
+        """
+        Crée (si besoin) un index partiel couvrant la requête des messages
+        d'erreur. Écrit dans la base : n'est utilisé que sur demande.
+        """
         table = self.table_name
-
         try:
-            # 1. Nombre total de lignes
-            count_total = self._execute_query(
-                f"SELECT COUNT(*) FROM {table}", fetch_one=True
+            self._conn.execute(
+                f"""
+                CREATE INDEX IF NOT EXISTS idx_{table}_error_message
+                ON {table}(error_message)
+                WHERE is_done = 0 AND error_message IS NOT NULL
+                """
             )
-            if count_total is None:
-                return None
-
-            # 2. is_done = 1
-            count_is_done_1 = self._execute_query(
-                f"SELECT COUNT(*) FROM {table} WHERE is_done = 1",
-                fetch_one=True,
+            self._conn.commit()
+        except sqlite3.Error as e:
+            sys.stderr.write(
+                f"⚠️  Index non créé dans '{self.db_name}': {e}\n"
             )
 
-            # 3. cmx_document_id non vide
-            count_cmx_not_empty = self._execute_query(
-                f"""
-                SELECT COUNT(*)
-                FROM {table}
-                WHERE cmx_document_id IS NOT NULL
-                  AND TRIM(cmx_document_id) <> ''
-                """,
-                fetch_one=True,
-            )
+    def get_stats(self) -> Dict[str, Any] | None:
+        """Calcule toutes les statistiques requises."""
+        db_name = self.db_name
 
-            # 4. is_done = 0
-            count_is_done_0 = self._execute_query(
-                f"SELECT COUNT(*) FROM {table} WHERE is_done = 0",
-                fetch_one=True,
-            )
+        if self._conn is None:
+            return None
 
-            # 5. is_done = 0 et error_message non vide
-            count_error_not_empty = self._execute_query(
-                f"""
-                SELECT COUNT(*)
-                FROM {table}
-                WHERE is_done = 0
-                  AND error_message IS NOT NULL
-                  AND TRIM(error_message) <> ''
-                """,
-                fetch_one=True,
-            )
+        try:
+            # 1 à 5. Tous les compteurs en un seul parcours de la table
+            counts = self._execute_query(self._sql_counts, fetch_one=True)
+            if counts is None:
+                return None
 
-            # 6. Récupération des messages d'erreur bruts
-            error_message_counts_raw = self._execute_query(
-                f"""
-                SELECT error_message
-                FROM {table}
-                WHERE is_done = 0
-                  AND error_message IS NOT NULL
-                  AND TRIM(error_message) <> ''
-                """
-            )
+            (
+                count_total,
+                count_is_done_1,
+                count_cmx_not_empty,
+                count_is_done_0,
+                count_error_not_empty,
+            ) = counts
+
+            # 6. Messages d'erreur distincts et leur nombre d'occurrences
+            #    (inutile si aucune ligne en erreur n'a été comptée)
+            if count_error_not_empty:
+                error_message_counts_raw = self._execute_query(
+                    self._sql_error_messages
+                )
+            else:
+                error_message_counts_raw = []
 
             # --- Normalisation et Agrégation des Messages d'Erreur ---
-            error_message_counts: Dict[str, int] = {}
-            for row in (error_message_counts_raw if error_message_counts_raw else []):
-                message = row[0] if row and row[0] is not None else ""
-                if re.match(ERROR_PATTERN, message):
+            error_message_counts: Dict[str, int] = Counter()
+            for message, occurrences in (error_message_counts_raw or []):
+                if (
+                    len(message) >= _ERROR_MIN_LEN
+                    and message.startswith(ERROR_PREFIX)
+                    and message.endswith(ERROR_SUFFIX)
+                ):
                     normalized_msg = NORMALIZED_ERROR_MESSAGE
                 else:
                     normalized_msg = message
 
-                error_message_counts[normalized_msg] = (
-                    error_message_counts.get(normalized_msg, 0) + 1
-                )
+                error_message_counts[normalized_msg] += occurrences
 
             return {
                 "db_name": db_name,
@@ -155,40 +236,58 @@ class SQLiteAnalyzer:
             return None
 
 
+def analyze_database(
+    db_path: str, build_indexes: bool = False
+) -> Dict[str, Any] | None:
+    """Analyse une base dans sa propre connexion (utilisable depuis un thread)."""
+    with SQLiteAnalyzer(db_path, build_indexes=build_indexes) as analyzer:
+        return analyzer.get_stats()
+
+
 # --- Fonctions Utilitaires d'Affichage ---
 
 
 def print_table(headers: List[str], rows: List[List[Any]], title: str | None = None):
     """Affiche une table simple en ASCII dans la console."""
-    if title:
-        print(title)
-
     if not rows:
+        if title:
+            print(title)
         print("(aucune donnée)\n")
         return
 
-    col_widths = [len(str(h)) for h in headers]
-    for row in rows:
-        for i, cell in enumerate(row):
-            col_widths[i] = max(col_widths[i], len(str(cell)))
+    _str = str
+    _len = len
+
+    # Conversion en texte une seule fois, réutilisée pour le calcul des
+    # largeurs (par colonne, via transposition) et pour l'affichage.
+    headers_str = [_str(h) for h in headers]
+    rows_str = [[_str(c) for c in row] for row in rows]
+    col_widths = [
+        max(map(_len, column)) for column in zip(headers_str, *rows_str)
+    ]
 
     sep = "+" + "+".join("-" * (w + 2) for w in col_widths) + "+"
-    fmt = "|" + "|".join(" {:<" + str(w) + "} " for w in col_widths) + "|"
 
-    print(sep)
-    print(fmt.format(*headers))
-    print(sep)
-    for row in rows:
-        print(fmt.format(*[str(c) for c in row]))
-    print(sep)
-    print()
+    def fmt_row(cells: List[str]) -> str:
+        return "| " + " | ".join(
+            c.ljust(w) for c, w in zip(cells, col_widths)
+        ) + " |"
+
+    # Table construite en mémoire puis écrite en un seul appel
+    lines = [title] if title else []
+    lines += [sep, fmt_row(headers_str), sep]
+    lines += [fmt_row(row) for row in rows_str]
+    lines += [sep, ""]
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def format_stats_report(all_stats: List[Dict[str, Any]]):
     """Présente les statistiques collectées sous forme de tableaux."""
-    print("\n" + "=" * 80)
-    print("✨ RAPPORT D'ANALYSE STATISTIQUE DES BASES TBL_FSADA ✨")
-    print("=" * 80)
+    sys.stdout.write(
+        "\n" + "=" * 80 + "\n"
+        "✨ RAPPORT D'ANALYSE STATISTIQUE DES BASES TBL_FSADA ✨\n"
+        + "=" * 80 + "\n"
+    )
 
     # Vue d'ensemble par base
     headers = [
@@ -246,6 +345,9 @@ def format_stats_report(all_stats: List[Dict[str, Any]]):
 
 # --- Fonction d'Export Excel / CSV ---
 
+# Sauts de ligne remplacés par un espace, retours chariot supprimés (une passe)
+_CSV_CLEAN_TABLE = str.maketrans({"\n": " ", "\r": None})
+
 
 def export_to_excel_csv(all_stats: List[Dict[str, Any]]):
     """
@@ -273,11 +375,15 @@ def export_to_excel_csv(all_stats: List[Dict[str, Any]]):
 
     try:
         # encoding='utf-8-sig' ajoute le BOM, ce qui force Excel à lire en UTF-8 correctement
-        with open(filename, mode='w', newline='', encoding='utf-8-sig') as csvfile:
+        # Tampon de 1 Mio : les lignes sont regroupées en peu d'écritures disque
+        with open(filename, mode='w', newline='', encoding='utf-8-sig',
+                  buffering=1 << 20) as csvfile:
             # Le délimiteur ';' est standard pour les CSV s'ouvrant dans Excel en version FR
             writer = csv.writer(csvfile, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            
-            writer.writerow(headers)
+            writerows = writer.writerows
+
+            # En-têtes fixes sans ';' ni '"' : aucun échappement CSV nécessaire
+            csvfile.write(";".join(headers) + "\r\n")
             
             rows_written = 0
             
@@ -301,16 +407,17 @@ def export_to_excel_csv(all_stats: List[Dict[str, Any]]):
                     # Tri par nombre décroissant pour la lisibilité
                     sorted_errors = sorted(errors.items(), key=lambda item: item[1], reverse=True)
                     
+                    # Lignes de la base écrites en un seul appel (boucle côté C)
+                    batch = []
                     for msg, count in sorted_errors:
                         # On nettoie un peu le message (sauts de ligne) pour le CSV
-                        clean_msg = msg.replace("\n", " ").replace("\r", "")
-                        row = base_info + [clean_msg, count]
-                        writer.writerow(row)
-                        rows_written += 1
+                        clean_msg = msg.translate(_CSV_CLEAN_TABLE)
+                        batch.append(base_info + [clean_msg, count])
+                    writerows(batch)
+                    rows_written += len(batch)
                 else:
                     # Si pas d'erreurs, on écrit quand même une ligne pour la base
-                    row = base_info + ["", 0]
-                    writer.writerow(row)
+                    writer.writerow(base_info + ["", 0])
                     rows_written += 1
                     
         print(f"\n✅ Fichier généré avec succès : {os.path.abspath(filename)}")
@@ -346,6 +453,25 @@ def ask_export_mode() -> bool:
         print("Réponse invalide, merci de taper O (Oui) ou N (Non).")
 
 
+def iter_dbs(root: str, recursive: bool) -> Iterator[Tuple[str, str]]:
+    """
+    Parcourt `root` (et ses sous-dossiers si `recursive`) et produit au fil
+    de l'eau les couples (dossier, chemin de la base .sqlite/.db).
+    """
+    if recursive:
+        for folder, _, files in os.walk(root):
+            for f in files:
+                if f.endswith((".sqlite", ".db")):
+                    yield folder, os.path.join(folder, f)
+    else:
+        folder = os.path.abspath(root)
+        # os.scandir fournit le type d'entrée sans appel stat supplémentaire
+        with os.scandir(root) as entries:
+            for e in entries:
+                if e.name.endswith((".sqlite", ".db")) and e.is_file():
+                    yield folder, e.path
+
+
 # --- Fonction Principale ---
 
 
@@ -367,6 +493,16 @@ def main():
         ),
     )
 
+    parser.add_argument(
+        "--build-indexes",
+        action="store_true",
+        help=(
+            "Crée si besoin un index partiel sur error_message dans chaque base "
+            "analysée.\nUtile uniquement pour des bases relues souvent "
+            "(modifie les fichiers)."
+        ),
+    )
+
     args = parser.parse_args()
 
     if not os.path.isdir(args.folder_path):
@@ -377,81 +513,64 @@ def main():
 
     recursive = ask_recursive_mode()
 
-    # { dossier_absolu: [liste de fichiers .db/.sqlite] }
-    folder_to_dbs: Dict[str, List[str]] = {}
-
-    if recursive:
-        for root, _, files in os.walk(args.folder_path):
-            dbs = [
-                os.path.join(root, f)
-                for f in files
-                if f.endswith((".sqlite", ".db"))
-            ]
-            if dbs:
-                folder_to_dbs[root] = dbs
-    else:
-        dbs = [
-            os.path.join(args.folder_path, f)
-            for f in os.listdir(args.folder_path)
-            if f.endswith((".sqlite", ".db"))
-        ]
-        if dbs:
-            folder_to_dbs[os.path.abspath(args.folder_path)] = dbs
+    all_stats: List[Dict[str, Any]] = []
+    # { dossier: [totaux dans l'ordre de FOLDER_TOTAL_KEYS] }
+    folder_summary: Dict[str, List[int]] = defaultdict(
+        lambda: [0] * len(FOLDER_TOTAL_KEYS)
+    )
 
-    if not folder_to_dbs:
-        print(
-            f"\n⛔ Aucun fichier '.sqlite' ou '.db' trouvé dans : {args.folder_path}"
-        )
-        return
+    # Les bases sont indépendantes : l'analyse est répartie sur plusieurs
+    # threads (sqlite3 relâche le GIL pendant l'exécution des requêtes).
+    # Chaque base est soumise dès sa découverte, sans attendre la fin du parcours.
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for folder, db_file in iter_dbs(args.folder_path, recursive):
+            # Totaux initialisés même si toutes les bases du dossier échouent
+            folder_summary[folder]
+            futures.append(
+                (
+                    folder,
+                    db_file,
+                    executor.submit(analyze_database, db_file, args.build_indexes),
+                )
+            )
 
-    all_stats: List[Dict[str, Any]] = []
-    folder_summary: Dict[str, Dict[str, int]] = {}
-
-    for folder, db_files in folder_to_dbs.items():
-        print(f"\n📂 Dossier : {folder}")
-        folder_totals = {
-            "total_rows": 0,
-            "is_done_1_count": 0,
-            "is_done_0_count": 0,
-            "cmx_document_id_not_empty_count": 0,
-            "is_done_0_with_error_count": 0,
-        }
-
-        for db_file in db_files:
-            analyzer = SQLiteAnalyzer(db_file)
-            stats = analyzer.get_stats()
+        if not futures:
+            print(
+                f"\n⛔ Aucun fichier '.sqlite' ou '.db' trouvé dans : {args.folder_path}"
+            )
+            return
+
+        # Agrégation dans l'ordre de soumission pour un rapport stable ; la
+        # progression est affichée ici pour que chaque base apparaisse sous
+        # son dossier, quel que soit l'ordre d'exécution des threads.
+        current_folder = None
+        for folder, db_file, future in futures:
+            if folder != current_folder:
+                print(f"\n📂 Dossier : {folder}")
+                current_folder = folder
+            print(f"⏳ Analyse de la base de données: {os.path.basename(db_file)}")
+            stats = future.result()
             if not stats:
                 continue
             all_stats.append(stats)
 
-            folder_totals["total_rows"] += stats["total_rows"]
-            folder_totals["is_done_1_count"] += stats["is_done_1_count"]
-            folder_totals["is_done_0_count"] += stats["is_done_0_count"]
-            folder_totals[
-                "cmx_document_id_not_empty_count"
-            ] += stats["cmx_document_id_not_empty_count"]
-            folder_totals[
-                "is_done_0_with_error_count"
-            ] += stats["is_done_0_with_error_count"]
-
-        folder_summary[folder] = folder_totals
+            folder_totals = folder_summary[folder]
+            folder_totals[:] = map(
+                operator.add,
+                folder_totals,
+                map(stats.__getitem__, FOLDER_TOTAL_KEYS),
+            )
 
     if all_stats:
         # Affichage Console
         format_stats_report(all_stats)
 
-        synth_rows = []
-        for folder, agg in folder_summary.items():
-            synth_rows.append(
-                [
-                    folder,
-                    agg["total_rows"],
-                    agg["is_done_1_count"],
-                    agg["is_done_0_count"],
-                    agg["cmx_document_id_not_empty_count"],
-                    agg["is_done_0_with_error_count"],
-                ]
-            )
+        synth_rows = [
+            [folder, *totals] for folder, totals in folder_summary.items()
+        ]
 
         print_table(
             ["Dossier", "Total", "is_done=1", "is_done=0",
@@ -5,20 +5,44 @@ import sqlite3
 import os
 import argparse
 import sys
+import json
 import re
-from typing import List, Dict, Any
+import shutil
+from typing import List, Dict, Any, Iterator, Tuple
 import zipfile
-import xml.etree.ElementTree as ET
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape as xml_escape
 
 # --- Constantes de Normalisation ---
 
-ERROR_PATTERN = (
-    r"The specified file .* does not exists or is not readable\.: Invalid file"
+# Motif GLOB évalué par SQLite (le '*' final reproduit le re.match non ancré
+# en fin de l'ancienne expression régulière)
+ERROR_GLOB = (
+    "The specified file * does not exists or is not readable.: Invalid file*"
 )
 NORMALIZED_ERROR_MESSAGE = (
     "The specified file {{file_full_path}} does not exists or is not readable.: Invalid file"
 )
 
+# Réglages de lecture appliqués à chaque connexion : cache de pages de 64 Mio,
+# accès au fichier par mmap (256 Mio), tables temporaires en mémoire.
+_READ_PRAGMAS = """
+    PRAGMA query_only = 1;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -65536;
+    PRAGMA temp_store = MEMORY;
+"""
+
+# Compteurs cumulés par dossier, dans l'ordre des colonnes de la synthèse
+FOLDER_TOTAL_KEYS = (
+    "total_rows",
+    "is_done_1_count",
+    "is_done_0_count",
+    "cmx_document_id_not_empty_count",
+    "is_done_0_with_error_count",
+)
+
 # --- Classe d'Analyse ---
 
 
@@ -31,121 +55,137 @@ class SQLiteAnalyzer:
     def __init__(self, db_path: str, table_name: str = "TBL_FSADA"):
         self.db_path = db_path
         self.table_name = table_name
-
-    def _execute_query(self, query: str, fetch_one: bool = False) -> Any:
-        """ExÃ©cute une requÃªte et retourne les rÃ©sultats."""
-        conn = None
-        result = None
-
+        # Nom affiché dans les messages, calculé une fois par base
+        self._db_basename = os.path.basename(db_path)
+
+    def _execute_query(
+        self,
+        cursor: sqlite3.Cursor,
+        query: str,
+        fetch_one: bool = False,
+        params: Dict[str, Any] | None = None,
+    ) -> Any:
+        """Exécute une requête sur le curseur de la connexion ouverte par get_stats."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(query)
-
+            cursor.execute(query, params or {})
             if fetch_one:
-                fetch_result = cursor.fetchone()
-                result = fetch_result[0] if fetch_result else 0
-            else:
-                result = cursor.fetchall()
+                return cursor.fetchone()
+            return cursor.fetchall()
 
         except sqlite3.OperationalError as e:
             sys.stderr.write(
-                f"âš ï¸ Erreur OpÃ©rationnelle dans '{os.path.basename(self.db_path)}': {e}\n"
+                f"âš ï¸ Erreur OpÃ©rationnelle dans '{self._db_basename}': {e}\n"
             )
-            result = None
         except sqlite3.Error as e:
             sys.stderr.write(
-                f"âš ï¸ Erreur SQLite gÃ©nÃ©rale dans '{os.path.basename(self.db_path)}': {e}\n"
+                f"âš ï¸ Erreur SQLite gÃ©nÃ©rale dans '{self._db_basename}': {e}\n"
             )
-            result = None
-        finally:
-            if conn:
-                conn.close()
+        return None
+
+    def _execute_iter(
+        self,
+        cursor: sqlite3.Cursor,
+        query: str,
+        params: Dict[str, Any] | None = None,
+        arraysize: int = 1000,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Exécute une requête et produit ses lignes par lots (fetchmany), sans fetchall."""
+        cursor.arraysize = arraysize
+        try:
+            cursor.execute(query, params or {})
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield from rows
 
-        return result
+        except sqlite3.OperationalError as e:
+            sys.stderr.write(
+                f"âš ï¸ Erreur OpÃ©rationnelle dans '{self._db_basename}': {e}\n"
+            )
+        except sqlite3.Error as e:
+            sys.stderr.write(
+                f"âš ï¸ Erreur SQLite gÃ©nÃ©rale dans '{self._db_basename}': {e}\n"
+            )
 
     def get_stats(self) -> Dict[str, Any] | None:
         """Calcule toutes les statistiques requises, y compris la normalisation des messages d'erreur."""
-        db_name = os.path.basename(self.db_path)
-        print(f"â³ Analyse de la base de donnÃ©es: {db_name}")
+        db_name = self._db_basename
 
         table = self.table_name
+        conn = None
 
         try:
-            # 1. Nombre total de lignes
-            count_total = self._execute_query(
-                f"SELECT COUNT(*) FROM {table}", fetch_one=True
-            )
-            if count_total is None:
-                return None
-
-            # 2. is_done = 1
-            count_is_done_1 = self._execute_query(
-                f"SELECT COUNT(*) FROM {table} WHERE is_done = 1",
-                fetch_one=True,
-            )
-
-            # 3. cmx_document_id non vide
-            count_cmx_not_empty = self._execute_query(
-                f"""
-                SELECT COUNT(*)
-                FROM {table}
-                WHERE cmx_document_id IS NOT NULL
-                  AND TRIM(cmx_document_id) <> ''
-                """,
-                fetch_one=True,
-            )
-
-            # 4. is_done = 0
-            count_is_done_0 = self._execute_query(
-                f"SELECT COUNT(*) FROM {table} WHERE is_done = 0",
-                fetch_one=True,
-            )
+            # Une seule connexion (et un seul curseur) pour toutes les requêtes.
+            # Connexion classique (chemins UNC, reprise d'un journal chaud) ;
+            # PRAGMA query_only interdit toute écriture par le script.
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.executescript(_READ_PRAGMAS)
+            except sqlite3.Error:
+                # Réglages facultatifs : l'erreur éventuelle (fichier invalide…)
+                # sera signalée par la première requête.
+                pass
+            # Colonnes accessibles par leur alias SQL
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
 
-            # 5. is_done = 0 et error_message non vide
-            count_error_not_empty = self._execute_query(
+            # 1 à 5. Tous les compteurs en un seul parcours de la table
+            counts = self._execute_query(
+                cursor,
                 f"""
-                SELECT COUNT(*)
+                SELECT COUNT(*) AS total_rows,
+                       COALESCE(SUM(CASE WHEN is_done = 1 THEN 1 ELSE 0 END), 0)
+                           AS is_done_1_count,
+                       COALESCE(SUM(CASE WHEN cmx_document_id IS NOT NULL
+                                          AND TRIM(cmx_document_id) <> ''
+                                         THEN 1 ELSE 0 END), 0)
+                           AS cmx_document_id_not_empty_count,
+                       COALESCE(SUM(CASE WHEN is_done = 0 THEN 1 ELSE 0 END), 0)
+                           AS is_done_0_count,
+                       COALESCE(SUM(CASE WHEN is_done = 0
+                                          AND error_message IS NOT NULL
+                                          AND TRIM(error_message) <> ''
+                                         THEN 1 ELSE 0 END), 0)
+                           AS is_done_0_with_error_count
                 FROM {table}
-                WHERE is_done = 0
-                  AND error_message IS NOT NULL
-                  AND TRIM(error_message) <> ''
                 """,
                 fetch_one=True,
             )
+            if counts is None:
+                return None
 
-            # 6. RÃ©cupÃ©ration des messages d'erreur bruts
-            error_message_counts_raw = self._execute_query(
-                f"""
-                SELECT error_message
-                FROM {table}
-                WHERE is_done = 0
-                  AND error_message IS NOT NULL
-                  AND TRIM(error_message) <> ''
-                """
-            )
-
-            # --- Normalisation et AgrÃ©gation des Messages d'Erreur ---
-            error_message_counts: Dict[str, int] = {}
-            for row in (error_message_counts_raw if error_message_counts_raw else []):
-                message = row[0] if row and row[0] is not None else ""
-                if re.match(ERROR_PATTERN, message):
-                    normalized_msg = NORMALIZED_ERROR_MESSAGE
-                else:
-                    normalized_msg = message
-
-                error_message_counts[normalized_msg] = (
-                    error_message_counts.get(normalized_msg, 0) + 1
+            # 6. Messages d'erreur normalisés et regroupés directement par SQLite
+            error_message_counts: Dict[str, int] = dict(
+                self._execute_iter(
+                    cursor,
+                    f"""
+                    SELECT CASE WHEN error_message GLOB :pattern
+                                THEN :normalized
+                                ELSE error_message
+                           END AS normalized_msg,
+                           COUNT(*)
+                    FROM {table}
+                    WHERE is_done = 0
+                      AND error_message IS NOT NULL
+                      AND TRIM(error_message) <> ''
+                    GROUP BY normalized_msg
+                    """,
+                    params={
+                        "pattern": ERROR_GLOB,
+                        "normalized": NORMALIZED_ERROR_MESSAGE,
+                    },
                 )
+            )
 
             return {
                 "db_name": db_name,
                 "db_path": self.db_path,
-                "total_rows": count_total,
-                "is_done_1_count": count_is_done_1 or 0,
-                "cmx_document_id_not_empty_count": count_cmx_not_empty or 0,
-                "is_done_0_count": count_is_done_0 or 0,
-                "is_done_0_with_error_count": count_error_not_empty or 0,
+                "total_rows": counts["total_rows"],
+                "is_done_1_count": counts["is_done_1_count"],
+                "cmx_document_id_not_empty_count": counts["cmx_document_id_not_empty_count"],
+                "is_done_0_count": counts["is_done_0_count"],
+                "is_done_0_with_error_count": counts["is_done_0_with_error_count"],
                 "error_message_breakdown": error_message_counts,
             }
 
@@ -154,6 +194,69 @@ class SQLiteAnalyzer:
                 f"âŒ Erreur inattendue lors de l'analyse de '{db_name}': {e}\n"
             )
             return None
+        finally:
+            if conn:
+                conn.close()
+
+
+# --- Cache des statistiques ---
+
+# Statistiques des bases déjà analysées, réutilisées tant que le fichier
+# (et son éventuel journal -wal) n'a pas changé. Le numéro de version
+# invalide le cache si le contenu des statistiques évolue.
+STATS_CACHE_PATH = Path.home() / ".cache" / "fsada_stats.json"
+_STATS_CACHE_VERSION = 1
+
+
+def _stats_signature(db_path: str) -> List[int] | None:
+    """
+    Signature (mtime_ns, taille) de la base, complétée par celle du fichier
+    -wal s'il existe. None si la base ne peut pas être lue.
+    """
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    signature = [st.st_mtime_ns, st.st_size]
+    try:
+        wal = os.stat(db_path + "-wal")
+        signature += [wal.st_mtime_ns, wal.st_size]
+    except OSError:
+        pass
+    return signature
+
+
+def load_stats_cache(cache_path: Path) -> Dict[str, Any]:
+    """
+    Charge le cache { chemin_absolu: {"signature": [...], "stats": {...}} }.
+    Un cache absent, illisible ou d'une autre version est ignoré.
+    """
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _STATS_CACHE_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def save_stats_cache(cache_path: Path, entries: Dict[str, Any]) -> None:
+    """Écrit le cache via un fichier temporaire (remplacement atomique)."""
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": _STATS_CACHE_VERSION, "entries": entries},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as exc:
+        sys.stderr.write(
+            f"\n⚠️ Cache des statistiques non enregistré ({cache_path}) : {exc}\n"
+        )
 
 
 # --- Fonctions Utilitaires d'Affichage ---
@@ -176,20 +279,18 @@ def print_table(headers: List[str], rows: List[List[Any]], title: str | None = N
     sep = "+" + "+".join("-" * (w + 2) for w in col_widths) + "+"
     fmt = "|" + "|".join(" {:<" + str(w) + "} " for w in col_widths) + "|"
 
-    print(sep)
-    print(fmt.format(*headers))
-    print(sep)
-    for row in rows:
-        print(fmt.format(*[str(c) for c in row]))
-    print(sep)
-    print()
+    # Table construite en mémoire puis écrite en un seul appel
+    out = [sep, fmt.format(*headers), sep]
+    out.extend([fmt.format(*[str(c) for c in row]) for row in rows])
+    out.append(sep)
+    sys.stdout.write("\n".join(out) + "\n\n")
 
 
 def format_stats_report(all_stats: List[Dict[str, Any]]):
     """PrÃ©sente les statistiques collectÃ©es sous forme de tableaux."""
-    print("\n" + "=" * 80)
-    print("âœ¨ RAPPORT D'ANALYSE STATISTIQUE DES BASES TBL_FSADA âœ¨")
-    print("=" * 80)
+    rule = "=" * 80
+    banner = "âœ¨ RAPPORT D'ANALYSE STATISTIQUE DES BASES TBL_FSADA âœ¨"
+    sys.stdout.write(f"\n{rule}\n{banner}\n{rule}\n")
 
     # Vue d'ensemble par base
     headers = [
@@ -257,6 +358,29 @@ def ask_recursive_mode() -> bool:
         print("RÃ©ponse invalide, merci de taper S ou R.")
 
 
+def _iter_dbs(root: str, recursive: bool) -> Iterator[str]:
+    """
+    Produit les chemins des bases .sqlite/.db de `root` (et de ses sous-dossiers
+    si `recursive`) via os.scandir, dont les entrées portent déjà leur type.
+    Même ordre de parcours qu'os.walk : fichiers du dossier, puis sous-dossiers.
+    """
+    subdirs: List[str] = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif entry.name.endswith((".sqlite", ".db")):
+                    yield entry.path
+    except OSError:
+        # Dossier illisible : ignoré, comme le faisait os.walk
+        return
+
+    for subdir in subdirs:
+        yield from _iter_dbs(subdir, recursive)
+
+
 # --- Fonction Principale ---
 
 
@@ -271,8 +395,13 @@ def _col_idx_to_name(idx: int) -> str:
     return name
 
 
-def _build_excel_rows(all_stats: List[Dict[str, Any]], file_system: str) -> List[List[Any]]:
-    rows: List[List[Any]] = []
+# Lettres des 26 premières colonnes, calculées une fois (l'export en utilise 7)
+_COL_NAMES = tuple(_col_idx_to_name(i) for i in range(1, 27))
+
+
+def _iter_excel_rows(all_stats: List[Dict[str, Any]],
+                     file_system: str) -> Iterator[Tuple[Any, ...]]:
+    """Produit les lignes de données Excel (une par message d'erreur et par base)."""
     for stats in all_stats:
         db_path = stats.get("db_path") or stats.get("db_name") or ""
         total = stats.get("total_rows", 0)
@@ -282,15 +411,80 @@ def _build_excel_rows(all_stats: List[Dict[str, Any]], file_system: str) -> List
 
         if breakdown:
             for msg, count in sorted(breakdown.items(), key=lambda it: it[1], reverse=True):
-                rows.append(
-                    [file_system, db_path, total, done, err_total, msg, count]
-                )
+                yield (file_system, db_path, total, done, err_total, msg, count)
         else:
-            rows.append(
-                [file_system, db_path, total, done, err_total, "", 0]
-            )
+            yield (file_system, db_path, total, done, err_total, "", 0)
+
+
+_SHEET_PART = "xl/worksheets/sheet1.xml"
+_SST_PART = "xl/sharedStrings.xml"
+_CONTENT_TYPES_PART = "[Content_Types].xml"
+_WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_AC_NS = "http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac"
+_ROW_NUM_RE = re.compile(rb'<row\b[^>]*?\sr="(\d+)"')
+_SST_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+)
+_SST_REL_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"
+)
+
+
+def _shared_strings_xml(existing: bytes | None, new_strings: List[str],
+                        new_refs: int) -> bytes:
+    """Ajoute `new_strings` à la table des chaînes partagées (ou la crée)."""
+    items = "".join(
+        f'<si><t xml:space="preserve">{xml_escape(text)}</t></si>'
+        for text in new_strings
+    ).encode("utf-8")
+
+    if existing is None:
+        return (
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            + f'<sst xmlns="{_MAIN_NS}" count="{new_refs}" '
+              f'uniqueCount="{len(new_strings)}">'.encode("utf-8")
+            + items
+            + b"</sst>"
+        )
+
+    head, sep, tail = existing.rpartition(b"</sst>")
+    if not sep:
+        raise RuntimeError("Table des chaînes partagées du modèle Excel invalide.")
+
+    # Mise à jour des compteurs de l'élément <sst> (attributs facultatifs)
+    def _bump(attr: bytes, delta: int, xml: bytes) -> bytes:
+        return re.sub(
+            rb'(<sst\b[^>]*\b' + attr + rb'=")(\d+)"',
+            lambda m: m.group(1) + str(int(m.group(2)) + delta).encode() + b'"',
+            xml,
+            count=1,
+        )
 
-    return rows
+    head = _bump(b"count", new_refs, head)
+    head = _bump(b"uniqueCount", len(new_strings), head)
+    return head + items + sep + tail
+
+
+def _register_shared_strings(content_types: bytes,
+                             workbook_rels: bytes) -> Tuple[bytes, bytes]:
+    """Déclare une nouvelle partie sharedStrings.xml dans le paquet du modèle."""
+    override = (
+        f'<Override PartName="/{_SST_PART}" ContentType="{_SST_CONTENT_TYPE}"/>'
+    ).encode("utf-8")
+    content_types = content_types.replace(b"</Types>", override + b"</Types>", 1)
+
+    used_ids = [int(n) for n in re.findall(rb'\bId="rId(\d+)"', workbook_rels)]
+    rel_id = max(used_ids, default=0) + 1
+    relationship = (
+        f'<Relationship Id="rId{rel_id}" Type="{_SST_REL_TYPE}" '
+        f'Target="sharedStrings.xml"/>'
+    ).encode("utf-8")
+    workbook_rels = workbook_rels.replace(
+        b"</Relationships>", relationship + b"</Relationships>", 1
+    )
+    return content_types, workbook_rels
 
 
 def export_stats_to_excel(template_path: str, output_path: str,
@@ -300,93 +494,101 @@ def export_stats_to_excel(template_path: str, output_path: str,
     Le fichier `template_path` doit être le modèle 'entete_stats.xlsx' contenant déjà
     les deux premières lignes d'entête. Les données seront ajoutées à partir de la
     troisième ligne.
-    """
-    rows_data = _build_excel_rows(all_stats, file_system)
-    if not rows_data:
-        raise ValueError("Aucune donnée à écrire dans le fichier Excel.")
 
+    Les lignes sont produites directement sous forme de texte XML et insérées dans
+    le <sheetData> du modèle ; les textes passent par la table des chaînes partagées.
+    """
     with zipfile.ZipFile(template_path, "r") as zin:
-        sheet_xml = zin.read("xl/worksheets/sheet1.xml")
-        root = ET.fromstring(sheet_xml)
-
-        ns = {
-            "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
-            "ac": "http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac",
-        }
+        names = set(zin.namelist())
+        sheet_xml = zin.read(_SHEET_PART)
 
-        sheet_data = root.find("main:sheetData", ns)
-        if sheet_data is None:
+        # Point d'insertion : juste avant </sheetData>, sans analyser tout le XML
+        head, sep, tail = sheet_xml.rpartition(b"</sheetData>")
+        if not sep:
             raise RuntimeError("Impossible de trouver <sheetData> dans le modèle Excel.")
 
-        existing_rows = sheet_data.findall("main:row", ns)
-        max_r = 0
-        for r in existing_rows:
-            try:
-                rr = int(r.get("r"))
-                if rr > max_r:
-                    max_r = rr
-            except (TypeError, ValueError):
-                pass
-
+        max_r = max((int(n) for n in _ROW_NUM_RE.findall(head)), default=0)
         start_row = max_r + 1 if max_r else 1
-        ac_ns = "http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac"
 
-        for i, row_values in enumerate(rows_data):
-            row_index = start_row + i
-            row_attrib = {
-                "r": str(row_index),
-                "spans": "1:7",
-                f"{{{ac_ns}}}dyDescent": "0.25",
-            }
+        # Préfixe déclaré par le modèle pour l'espace de noms x14ac (dyDescent)
+        ac_prefix = re.search(
+            rb'xmlns:([\w.-]+)="' + re.escape(_AC_NS.encode()) + rb'"', head
+        )
+        row_attrs = ' spans="1:7"' + (
+            f' {ac_prefix.group(1).decode()}:dyDescent="0.25"' if ac_prefix else ""
+        )
 
-            row_elem = ET.Element(
-                "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}row",
-                row_attrib,
-            )
+        existing_sst = zin.read(_SST_PART) if _SST_PART in names else None
+        sst_base = (
+            len(re.findall(rb"<si\b", existing_sst)) if existing_sst is not None else 0
+        )
+        sst_index: Dict[str, int] = {}
+        sst_refs = 0
 
-            for col_idx, value in enumerate(row_values, start=1):
-                col_name = _col_idx_to_name(col_idx)
-                cell_ref = f"{col_name}{row_index}"
-                cell_attrib = {"r": cell_ref, "s": "2"}  # style 2 comme la ligne d'exemple
+        parts: List[str] = []
+        # Lignes consommées au fil de l'eau, sans liste intermédiaire
+        for i, row_values in enumerate(_iter_excel_rows(all_stats, file_system)):
+            row_index = start_row + i
+            cells: List[str] = []
 
-                cell_elem = ET.Element(
-                    "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}c",
-                    cell_attrib,
+            for col_idx, value in enumerate(row_values, start=1):
+                col_name = (
+                    _COL_NAMES[col_idx - 1]
+                    if col_idx <= len(_COL_NAMES)
+                    else _col_idx_to_name(col_idx)
                 )
+                cell_ref = f"{col_name}{row_index}"
 
+                # style 2 comme la ligne d'exemple
                 if value is None or value == "":
                     # Cellule vide : on ne met ni <v> ni texte.
-                    pass
+                    cells.append(f'<c r="{cell_ref}" s="2"/>')
                 elif isinstance(value, (int, float)):
-                    v_elem = ET.SubElement(
-                        cell_elem,
-                        "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v",
-                    )
-                    v_elem.text = str(value)
+                    cells.append(f'<c r="{cell_ref}" s="2"><v>{value}</v></c>')
                 else:
-                    cell_elem.set("t", "inlineStr")
-                    is_elem = ET.SubElement(
-                        cell_elem,
-                        "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}is",
-                    )
-                    t_elem = ET.SubElement(
-                        is_elem,
-                        "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t",
-                    )
-                    t_elem.text = str(value)
+                    text = str(value)
+                    idx = sst_index.get(text)
+                    if idx is None:
+                        idx = sst_index[text] = sst_base + len(sst_index)
+                    sst_refs += 1
+                    cells.append(f'<c r="{cell_ref}" s="2" t="s"><v>{idx}</v></c>')
 
-                row_elem.append(cell_elem)
+            parts.append(f'<row r="{row_index}"{row_attrs}>{"".join(cells)}</row>')
 
-            sheet_data.append(row_elem)
+        # Vérifié avant toute écriture du fichier de sortie
+        if not parts:
+            raise ValueError("Aucune donnée à écrire dans le fichier Excel.")
 
-        new_sheet_xml = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+        replacements: Dict[str, bytes] = {
+            _SHEET_PART: head + "".join(parts).encode("utf-8") + sep + tail,
+        }
+        if sst_index:
+            replacements[_SST_PART] = _shared_strings_xml(
+                existing_sst, list(sst_index), sst_refs
+            )
+            if existing_sst is None:
+                (
+                    replacements[_CONTENT_TYPES_PART],
+                    replacements[_WORKBOOK_RELS_PART],
+                ) = _register_shared_strings(
+                    zin.read(_CONTENT_TYPES_PART), zin.read(_WORKBOOK_RELS_PART)
+                )
 
         with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
             for item in zin.infolist():
-                data_bytes = zin.read(item.filename)
-                if item.filename == "xl/worksheets/sheet1.xml":
-                    data_bytes = new_sheet_xml
-                zout.writestr(item, data_bytes)
+                data_bytes = replacements.pop(item.filename, None)
+                if data_bytes is not None:
+                    zout.writestr(item, data_bytes)
+                    continue
+                # Parties inchangées recopiées par blocs de 1 Mio, sans charger
+                # chaque fichier entièrement en mémoire
+                with zin.open(item) as src, zout.open(item, "w") as dst:
+                    shutil.copyfileobj(src, dst, length=1 << 20)
+
+            # Parties nouvelles (sharedStrings.xml absent du modèle)
+            for filename, data_bytes in replacements.items():
+                zout.writestr(filename, data_bytes)
+
 
 
 
@@ -417,6 +619,15 @@ def main():
             "L'entête sera basée sur le modèle 'entete_stats.xlsx' situé à côté du script."
         ),
     )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help=(
+            "Ignore le cache des statistiques et ré-analyse toutes les bases "
+            f"(cache : {STATS_CACHE_PATH})."
+        ),
+    )
 
 
     args = parser.parse_args()
@@ -431,24 +642,11 @@ def main():
 
     # { dossier_absolu: [liste de fichiers .db/.sqlite] }
     folder_to_dbs: Dict[str, List[str]] = {}
+    root_folder = os.path.abspath(args.folder_path)
 
-    if recursive:
-        for root, _, files in os.walk(args.folder_path):
-            dbs = [
-                os.path.join(root, f)
-                for f in files
-                if f.endswith((".sqlite", ".db"))
-            ]
-            if dbs:
-                folder_to_dbs[root] = dbs
-    else:
-        dbs = [
-            os.path.join(args.folder_path, f)
-            for f in os.listdir(args.folder_path)
-            if f.endswith((".sqlite", ".db"))
-        ]
-        if dbs:
-            folder_to_dbs[os.path.abspath(args.folder_path)] = dbs
+    for db_file in _iter_dbs(args.folder_path, recursive):
+        folder = os.path.dirname(db_file) if recursive else root_folder
+        folder_to_dbs.setdefault(folder, []).append(db_file)
 
     if not folder_to_dbs:
         print(
@@ -457,52 +655,85 @@ def main():
         return
 
     all_stats: List[Dict[str, Any]] = []
-    folder_summary: Dict[str, Dict[str, int]] = {}
-
-    for folder, db_files in folder_to_dbs.items():
-        print(f"\nðŸ“‚ Dossier : {folder}")
-        folder_totals = {
-            "total_rows": 0,
-            "is_done_1_count": 0,
-            "is_done_0_count": 0,
-            "cmx_document_id_not_empty_count": 0,
-            "is_done_0_with_error_count": 0,
-        }
+    # { dossier: [compteurs d'une base, dans l'ordre de FOLDER_TOTAL_KEYS] }
+    folder_counts: Dict[str, List[Tuple[int, ...]]] = {}
+
+    for folder in folder_to_dbs:
+        folder_counts[folder] = []
+
+    # Analyse des bases en parallèle : sqlite3 relâche le GIL pendant
+    # l'exécution des requêtes, les lectures disque se recouvrent.
+    pairs = [
+        (folder, db_file)
+        for folder, db_files in folder_to_dbs.items()
+        for db_file in db_files
+    ]
 
-        for db_file in db_files:
-            analyzer = SQLiteAnalyzer(db_file)
-            stats = analyzer.get_stats()
+    # Bases inchangées depuis la dernière exécution : statistiques reprises
+    # du cache, seules les autres sont soumises à l'analyse.
+    use_cache = not args.no_cache
+    cache = load_stats_cache(STATS_CACHE_PATH) if use_cache else {}
+    results: List[Dict[str, Any] | None] = [None] * len(pairs)
+    signatures: List[List[int] | None] = []
+    to_analyze: List[int] = []
+
+    for i, (_, db_file) in enumerate(pairs):
+        signature = _stats_signature(db_file)
+        signatures.append(signature)
+        entry = cache.get(os.path.abspath(db_file))
+        if signature is not None and entry and entry.get("signature") == signature:
+            results[i] = dict(entry["stats"], db_path=db_file)
+        else:
+            to_analyze.append(i)
+
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        analyzed = executor.map(
+            lambda i: SQLiteAnalyzer(pairs[i][1]).get_stats(), to_analyze
+        )
+
+        # Résultats lus dans l'ordre des fichiers : la progression est affichée
+        # ici pour que chaque base apparaisse sous son dossier, quel que soit
+        # l'ordre d'exécution des threads. Agrégation dans le thread principal.
+        current_folder = None
+        for i, (folder, db_file) in enumerate(pairs):
+            if folder != current_folder:
+                print(f"\nðŸ“‚ Dossier : {folder}")
+                current_folder = folder
+
+            if results[i] is not None:
+                print(f"♻️ Statistiques reprises du cache: {os.path.basename(db_file)}")
+            else:
+                print(f"â³ Analyse de la base de donnÃ©es: {os.path.basename(db_file)}")
+                results[i] = next(analyzed)
+                if results[i] and signatures[i] is not None:
+                    cache[os.path.abspath(db_file)] = {
+                        "signature": signatures[i],
+                        "stats": results[i],
+                    }
+
+            stats = results[i]
             if not stats:
                 continue
             all_stats.append(stats)
 
-            folder_totals["total_rows"] += stats["total_rows"]
-            folder_totals["is_done_1_count"] += stats["is_done_1_count"]
-            folder_totals["is_done_0_count"] += stats["is_done_0_count"]
-            folder_totals[
-                "cmx_document_id_not_empty_count"
-            ] += stats["cmx_document_id_not_empty_count"]
-            folder_totals[
-                "is_done_0_with_error_count"
-            ] += stats["is_done_0_with_error_count"]
+            folder_counts[folder].append(
+                tuple(map(stats.__getitem__, FOLDER_TOTAL_KEYS))
+            )
 
-        folder_summary[folder] = folder_totals
+    if use_cache and to_analyze:
+        save_stats_cache(STATS_CACHE_PATH, cache)
 
     if all_stats:
         format_stats_report(all_stats)
 
-        synth_rows = []
-        for folder, agg in folder_summary.items():
-            synth_rows.append(
-                [
-                    folder,
-                    agg["total_rows"],
-                    agg["is_done_1_count"],
-                    agg["is_done_0_count"],
-                    agg["cmx_document_id_not_empty_count"],
-                    agg["is_done_0_with_error_count"],
-                ]
-            )
+        # Totaux par colonne : les compteurs de chaque dossier sont
+        # transposés (zip) puis sommés colonne par colonne
+        no_counts = [(0,) * len(FOLDER_TOTAL_KEYS)]
+        synth_rows = [
+            [folder, *map(sum, zip(*(counts or no_counts)))]
+            for folder, counts in folder_counts.items()
+        ]
 
         print_table(
             ["Dossier", "Total", "is_done=1", "is_done=0",